@@ -0,0 +1,122 @@
+import re
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import orjson
+
+# sentence-transformers is optional - falls back to hashed bag-of-words vectors
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+    SentenceTransformer = None
+
+DEFAULT_CAPACITY = 1024
+DEFAULT_TTL_SECONDS = 3600
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384
+SEMANTIC_THRESHOLD = 0.92
+
+
+class LRUCache:
+    """
+    Small in-process LRU with per-entry expiry for exact-match LLM responses.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, ttl: float = DEFAULT_TTL_SECONDS):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+
+_cache = LRUCache()
+
+
+def make_key(payload: Dict[str, Any]) -> str:
+    return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def cache_get(key: str) -> Optional[Any]:
+    return _cache.get(key)
+
+
+def cache_put(key: str, value: Any, ttl: Optional[float] = None) -> None:
+    _cache.set(key, value, ttl)
+
+
+_embedder = None
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _hash_embed(text: str) -> np.ndarray:
+    vec = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for token in _TOKEN_RE.findall(text.lower()):
+        h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+        vec[h % EMBEDDING_DIM] += 1.0 if h >> 63 else -1.0
+    return vec
+
+
+def embed_text(text: str) -> np.ndarray:
+    global _embedder
+    if SENTENCE_TRANSFORMERS_AVAILABLE:
+        if _embedder is None:
+            _embedder = SentenceTransformer(EMBEDDING_MODEL)
+        return np.asarray(_embedder.encode(text), dtype=np.float32)
+    return _hash_embed(text)
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour cache over normalized embeddings; hits at cosine >= threshold.
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_THRESHOLD, capacity: int = 256):
+        self.threshold = threshold
+        self.capacity = capacity
+        self._embeddings = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        self._values: List[Any] = []
+
+    async def lookup(self, text: str) -> Tuple[Optional[Any], np.ndarray]:
+        """
+        Returns (cached value or None, normalized query embedding for a later add()).
+        """
+        query = await asyncio.to_thread(embed_text, text)
+        norm = float(np.linalg.norm(query))
+        if norm:
+            query = query / norm
+        if not self._values or not norm:
+            return None, query
+        sims = self._embeddings @ query
+        best = int(np.argmax(sims))
+        if sims[best] >= self.threshold:
+            return self._values[best], query
+        return None, query
+
+    def add(self, embedding: np.ndarray, value: Any) -> None:
+        if not np.any(embedding):
+            return
+        self._embeddings = np.vstack([self._embeddings, embedding[np.newaxis, :]])[-self.capacity :]
+        self._values = (self._values + [value])[-self.capacity :]
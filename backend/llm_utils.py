@@ -1,57 +1,243 @@
 import os
+import re
 import json
-from typing import Tuple, Dict, Any, List
+import asyncio
+from typing import Tuple, Dict, Any, List, Optional
 
 import httpx
+import orjson
+from dotenv import load_dotenv
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 
+import llm_cache
 
-async def generate_title_from_transcript(transcript: str, model: str = "grok-4-1-fast-reasoning") -> Tuple[str, Dict[str, Any]]:
+# LLMLingua is optional - without it transcripts are trimmed on word boundaries
+try:
+    from llmlingua import PromptCompressor
+    LLMLINGUA_AVAILABLE = True
+except ImportError:
+    LLMLINGUA_AVAILABLE = False
+    PromptCompressor = None
+
+LLMLINGUA_MODEL = "microsoft/llmlingua-2-xlm-roberta-large-meetingbank"
+CHARS_PER_TOKEN = 4
+
+load_dotenv()
+
+XAI_API_KEY = os.getenv("XAI_API_KEY")
+BASE_URL = os.getenv("BASE_URL", "https://api.x.ai/v1")
+CHAT_COMPLETIONS_URL = f"{BASE_URL}/chat/completions"
+CHAT_HEADERS = {
+    "Authorization": f"Bearer {XAI_API_KEY}",
+    "Content-Type": "application/json",
+}
+
+# Static prompt text lives in the system role and stays byte-identical across calls
+# so provider-side prefix caching can match; all per-call values follow TRANSCRIPT_MARKER.
+TRANSCRIPT_MARKER = "\n---TRANSCRIPT---\n"
+TITLE_SYSTEM = (
+    "Title this transcript (3-8 words, no emojis/quotes).\n"
+    "Return JSON {\"title\":\"...\"} only."
+)
+INSIGHTS_SYSTEM = (
+    "You are a meticulous live note taker and X discovery assistant.\n"
+    "Given transcript excerpts and user interest signals, highlight the most important discussion topics and pointers the user will want to reference in the future.\n"
+    "Write 1-2 exceptionally high-quality bullet notes that capture context, decisions, or insights tailored to their interests. Keep each bullet succinct (no more than ~10 words).\n"
+    "Do not directly mention or describe the stated user interests; use them only to decide which transcript details matter.\n"
+    "Return only valid JSON: {\"notes\": [..]}."
+)
+ARTIFACT_QUERY_SYSTEM = (
+    "You craft focused natural language search queries for X (Twitter) search.\n"
+    "Given the latest portion of a transcript, propose a short query (few words) that best represents the topic the user would want to explore on X.\n"
+    "Do not mention the words 'query' or 'search'; just output the keyword phrase itself, avoiding quotes and hashtags.\n"
+    "Return only valid JSON: {\"query\": \"...\"}."
+)
+INTEREST_SUMMARY_SYSTEM = (
+    "You analyze a user's recent liked tweets on X. "
+    "Write 2-3 sentences that capture the themes, topics, or people they are most interested in lately. "
+    "Stay high-level (e.g., 'They follow AI founders and product strategy threads'). "
+    "Return only valid JSON with a single field: {\"summary\": \"...\"}."
+)
+ANSWER_SYSTEM = (
+    "You answer questions about a transcript. "
+    "Provide a concise (<=2 sentences) helpful answer grounded only in the provided transcript excerpt. "
+    "If unsure, say you don't know. User interests are for relevance only."
+)
+
+_interest_cache = llm_cache.SemanticCache()
+
+# Shared pooled HTTP/2 client so repeated Grok calls multiplex over warm connections
+_HTTP_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+async def get_client() -> httpx.AsyncClient:
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+        _HTTP_CLIENT = httpx.AsyncClient(
+            timeout=httpx.Timeout(20.0),
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=100, keepalive_expiry=30),
+            http2=True,
+        )
+    return _HTTP_CLIENT
+
+
+async def close_client() -> None:
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is not None:
+        await _HTTP_CLIENT.aclose()
+        _HTTP_CLIENT = None
+
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, httpx.TransportError)
+
+
+@retry(
+    retry=retry_if_exception(_is_retryable),
+    wait=wait_exponential_jitter(initial=0.5, max=8),
+    stop=stop_after_attempt(4),
+    reraise=True,
+)
+async def _stream_chat_completion(payload: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """
+    POST a streaming (SSE) chat completion and assemble the content deltas as they arrive.
+    Returns the message content and a non-streaming-shaped response dict for callers keeping the raw data.
+    """
+    client = await get_client()
+    parts: List[str] = []
+    last_event: Dict[str, Any] = {}
+    body = orjson.dumps({**payload, "stream": True})
+    async with client.stream("POST", CHAT_COMPLETIONS_URL, headers=CHAT_HEADERS, content=body) as resp:
+        resp.raise_for_status()
+        async for line in resp.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            chunk = line[5:].strip()
+            if chunk == "[DONE]":
+                break
+            event = orjson.loads(chunk)
+            last_event = event
+            for choice in event.get("choices") or []:
+                delta = choice.get("delta") or {}
+                if delta.get("content"):
+                    parts.append(delta["content"])
+    content = "".join(parts)
+    data = {**last_event, "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]}
+    return content, data
+
+
+_NEWLINE_TABLE = str.maketrans({"\n": " ", "\r": " "})
+_JSON_DECODER = json.JSONDecoder()
+_OBJECT_START_RE = re.compile(r"\{")
+
+
+def _extract_json(content: str) -> Dict[str, Any]:
+    """
+    Parse a JSON object from model output, tolerating prose around it.
+    Falls back to decoding from each "{" in turn so nested braces are handled.
+    """
+    try:
+        parsed = orjson.loads(content)
+    except orjson.JSONDecodeError:
+        for match in _OBJECT_START_RE.finditer(content):
+            try:
+                parsed, _end = _JSON_DECODER.raw_decode(content, match.start())
+            except ValueError:
+                continue
+            if isinstance(parsed, dict):
+                return parsed
+        raise ValueError("No JSON object found in model response")
+    if not isinstance(parsed, dict):
+        raise ValueError("Model response is not a JSON object")
+    return parsed
+
+
+_compressor = None
+
+
+def _get_compressor():
+    global _compressor
+    if _compressor is None:
+        _compressor = PromptCompressor(model_name=LLMLINGUA_MODEL, use_llmlingua2=True)
+    return _compressor
+
+
+def _word_window(text: str, max_chars: int, from_end: bool) -> str:
+    if len(text) <= max_chars:
+        return text
+    if from_end:
+        window = text[-max_chars:]
+        cut = window.find(" ")
+        return window[cut + 1 :] if cut != -1 else window
+    window = text[:max_chars]
+    cut = window.rfind(" ")
+    return window[:cut] if cut != -1 else window
+
+
+async def compress_transcript(text: str, target_tokens: int, rate: float, from_end: bool = True) -> str:
+    """
+    Select roughly target_tokens of transcript without splitting words.
+    With LLMLingua installed, a wider window (target_tokens / rate) is pruned by token
+    self-information instead, keeping salient content from further back.
     """
-    Generate a succinct title from a transcript using Grok via REST (OpenAI-compatible).
+    if not text:
+        return text
+    if LLMLINGUA_AVAILABLE:
+        window = _word_window(text, int(target_tokens / rate) * CHARS_PER_TOKEN, from_end)
+        try:
+            compressed = await asyncio.to_thread(
+                _get_compressor().compress_prompt, window, rate=rate, target_token=target_tokens
+            )
+            return compressed["compressed_prompt"]
+        except Exception as e:
+            print(f"Prompt compression failed, using raw excerpt: {e}")
+    return _word_window(text, target_tokens * CHARS_PER_TOKEN, from_end)
+
+
+def _response_cache_key(payload: Dict[str, Any]) -> Optional[str]:
+    # Only deterministic (temperature 0) calls are safe to replay from the exact-match cache
+    if payload.get("temperature") != 0:
+        return None
+    return llm_cache.make_key(payload)
+
+
+async def generate_title_from_transcript(transcript: str, model: str = "grok-3-mini") -> Tuple[str, Dict[str, Any]]:
+    """
+    Generate a succinct title from the opening of a transcript.
     Returns the title and raw response.
     """
-    api_key = os.getenv("XAI_API_KEY")
-    base_url = os.getenv("BASE_URL", "https://api.x.ai/v1")
-    if not api_key:
+    if not XAI_API_KEY:
         raise ValueError("Missing XAI_API_KEY")
 
-    url = f"{base_url}/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    prompt = (
-        "You generate short, punchy titles (3-8 words) for recorded conversations. "
-        "No emojis or quotes. Return JSON with a single field: {\"title\": \"<title>\"}."
-        f"\nTranscript excerpt:\n{transcript[:6000]}"
-    )
+    # Titles tolerate more loss, so keep a larger share of the opening
+    excerpt = await compress_transcript(transcript, target_tokens=1500, rate=0.5, from_end=False)
     payload = {
         "model": model,
         "messages": [
-            {"role": "system", "content": "Return only valid JSON with the title field."},
-            {"role": "user", "content": prompt},
+            {"role": "system", "content": TITLE_SYSTEM},
+            {"role": "user", "content": f"{TRANSCRIPT_MARKER.lstrip()}{excerpt}"},
         ],
-        "temperature": 0.3,
+        # Deterministic titles make exact-match caching safe
+        "temperature": 0,
     }
+    cache_key = _response_cache_key(payload)
+    cached = llm_cache.cache_get(cache_key) if cache_key else None
+    if cached:
+        return cached
 
-    async with httpx.AsyncClient(timeout=20) as client:
-        resp = await client.post(url, headers=headers, json=payload)
-        resp.raise_for_status()
-        data = resp.json()
-        content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-        try:
-            parsed = json.loads(content)
-        except Exception:
-            start = content.find("{")
-            end = content.rfind("}")
-            if start != -1 and end != -1:
-                parsed = json.loads(content[start : end + 1])
-            else:
-                raise
-        title = parsed.get("title")
-        if not title:
-            raise ValueError("Title missing in response")
-        return title.strip(), data
+    content, data = await _stream_chat_completion(payload)
+    title = (_extract_json(content).get("title") or "").strip()
+    if not title:
+        raise ValueError("Title missing in response")
+    result = (title, data)
+    if cache_key:
+        llm_cache.cache_put(cache_key, result)
+    return result
 
 
 async def generate_insights_from_transcript(
@@ -60,56 +246,27 @@ async def generate_insights_from_transcript(
     user_interests: str = "",
 ) -> Dict[str, Any]:
     """
-    Generate high-quality reference notes from a transcript and optional user interests.
+    Generate reference notes from the latest part of a transcript and optional user interests.
     Returns a dict with notes plus an (unused) artifacts list for compatibility.
     """
-    api_key = os.getenv("XAI_API_KEY")
-    base_url = os.getenv("BASE_URL", "https://api.x.ai/v1")
-    if not api_key:
+    if not XAI_API_KEY:
         raise ValueError("Missing XAI_API_KEY")
 
-    url = f"{base_url}/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    excerpt = transcript[-1000:] if transcript and len(transcript) > 1000 else transcript
-    prompt = (
-        "You are a meticulous live note taker and X discovery assistant.\n"
-        "Given transcript excerpts and user interest signals, highlight the most important discussion topics and pointers the user will want to reference in the future.\n"
-        "Write 1-2 exceptionally high-quality bullet notes that capture context, decisions, or insights tailored to their interests. Keep each bullet succinct (no more than ~10 words).\n"
-        "Do not directly mention or describe the stated user interests; use them only to decide which transcript details matter.\n"
-        "Return JSON: {\"notes\": [..]}.\n"
-        f"User interests: {user_interests or 'not provided'}\n"
-        f"Transcript excerpt (last 1000 chars):\n{excerpt}"
-    )
+    excerpt = await compress_transcript(transcript, target_tokens=250, rate=0.3)
+    prompt = f"User interests: {user_interests or 'not provided'}{TRANSCRIPT_MARKER}{excerpt}"
     payload = {
         "model": model,
         "messages": [
-            {"role": "system", "content": "Return only valid JSON with a notes array."},
+            {"role": "system", "content": INSIGHTS_SYSTEM},
             {"role": "user", "content": prompt},
         ],
         "temperature": 0.2,
     }
-    async with httpx.AsyncClient(timeout=20) as client:
-        resp = await client.post(url, headers=headers, json=payload)
-        resp.raise_for_status()
-        data = resp.json()
-        content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-        parsed = {}
-        try:
-            parsed = json.loads(content)
-        except Exception:
-            start = content.find("{")
-            end = content.rfind("}")
-            if start != -1 and end != -1:
-                parsed = json.loads(content[start : end + 1])
-            else:
-                raise
-        notes = parsed.get("notes") or []
-        if not isinstance(notes, list):
-            raise ValueError("Malformed insights response")
-        return {"notes": notes, "artifacts": [], "raw": data}
+    content, data = await _stream_chat_completion(payload)
+    notes = _extract_json(content).get("notes") or []
+    if not isinstance(notes, list):
+        raise ValueError("Malformed insights response")
+    return {"notes": notes, "artifacts": [], "raw": data}
 
 
 async def generate_artifact_search_query(
@@ -117,105 +274,62 @@ async def generate_artifact_search_query(
     user_interests: str = "",
     model: str = "grok-3-mini",
 ) -> str:
-    api_key = os.getenv("XAI_API_KEY")
-    base_url = os.getenv("BASE_URL", "https://api.x.ai/v1")
-    if not api_key:
+    if not XAI_API_KEY:
         raise ValueError("Missing XAI_API_KEY")
 
     excerpt = transcript_excerpt[-1000:] if transcript_excerpt and len(transcript_excerpt) > 1000 else transcript_excerpt
-    prompt = (
-        "You craft focused natural language search queries for X (Twitter) search.\n"
-        "Given the latest portion of a transcript and optional user interests, propose a short query (few words) that best represents the topic the user would want to explore on X.\n"
-        "Do not mention the words 'query' or 'search'; just output the keyword phrase itself, avoiding quotes and hashtags.\n"
-        "Return JSON: {\"query\": \"...\"}.\n"
-        f"Transcript excerpt (last 1000 chars):\n{excerpt}"
-    )
-    url = f"{base_url}/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
+    prompt = f"{TRANSCRIPT_MARKER.lstrip()}{excerpt}"
     payload = {
         "model": model,
         "messages": [
-            {"role": "system", "content": "Return only valid JSON with a query field."},
+            {"role": "system", "content": ARTIFACT_QUERY_SYSTEM},
             {"role": "user", "content": prompt},
         ],
         "temperature": 0.2,
     }
-    async with httpx.AsyncClient(timeout=20) as client:
-        resp = await client.post(url, headers=headers, json=payload)
-        resp.raise_for_status()
-        data = resp.json()
-        content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-        parsed = {}
-        try:
-            parsed = json.loads(content)
-        except Exception:
-            start = content.find("{")
-            end = content.rfind("}")
-            if start != -1 and end != -1:
-                parsed = json.loads(content[start : end + 1])
-            else:
-                raise
-        query = parsed.get("query", "").strip()
-        if not query:
-            raise ValueError("Query missing in response")
-        return query
+    content, data = await _stream_chat_completion(payload)
+    parsed = _extract_json(content)
+    query = parsed.get("query", "").strip()
+    if not query:
+        raise ValueError("Query missing in response")
+    return query
 
 
 async def summarize_user_interest_theme(likes: List[Dict[str, Any]], model: str = "grok-3-mini") -> str:
-    api_key = os.getenv("XAI_API_KEY")
-    base_url = os.getenv("BASE_URL", "https://api.x.ai/v1")
-    if not api_key:
+    if not XAI_API_KEY:
         raise ValueError("Missing XAI_API_KEY")
 
-    excerpts = []
-    for idx, item in enumerate(likes[:20], start=1):
-        text = (item.get("text") or "").replace("\n", " ").strip()
-        if text:
-            excerpts.append(f"{idx}. {text[:400]}")
-    context = "\n".join(excerpts) if excerpts else "No recent likes available."
-
-    url = f"{base_url}/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    prompt = (
-        "You analyze a user's recent liked tweets on X. "
-        "Write 2-3 sentences that capture the themes, topics, or people they are most interested in lately. "
-        "Stay high-level (e.g., 'They follow AI founders and product strategy threads'). "
-        "Return JSON with a single field: {\"summary\": \"...\"}.\n"
-        f"Content from the recently liked posts:\n{context}"
-    )
+    texts = ((item.get("text") or "").translate(_NEWLINE_TABLE).strip()[:400] for item in likes[:20])
+    context = "\n".join(f"{idx}. {text}" for idx, text in enumerate(filter(None, texts), start=1))
+    context = context or "No recent likes available."
+
+    prompt = f"Content from the recently liked posts:\n{context}"
     payload = {
         "model": model,
         "messages": [
-            {"role": "system", "content": "Return only valid JSON with a summary field."},
+            {"role": "system", "content": INTEREST_SUMMARY_SYSTEM},
             {"role": "user", "content": prompt},
         ],
-        "temperature": 0.3,
+        "temperature": 0,
     }
-    async with httpx.AsyncClient(timeout=20) as client:
-        resp = await client.post(url, headers=headers, json=payload)
-        resp.raise_for_status()
-        data = resp.json()
-        content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-        parsed = {}
-        try:
-            parsed = json.loads(content)
-        except Exception:
-            start = content.find("{")
-            end = content.rfind("}")
-            if start != -1 and end != -1:
-                parsed = json.loads(content[start : end + 1])
-            else:
-                raise
-        summary = parsed.get("summary", "").strip()
-        if not summary:
-            raise ValueError("Summary missing in response")
-        return summary
+    cache_key = _response_cache_key(payload)
+    cached = llm_cache.cache_get(cache_key) if cache_key else None
+    if cached:
+        return cached
+
+    similar, embedding = await _interest_cache.lookup(context)
+    if similar:
+        return similar
+
+    content, data = await _stream_chat_completion(payload)
+    parsed = _extract_json(content)
+    summary = parsed.get("summary", "").strip()
+    if not summary:
+        raise ValueError("Summary missing in response")
+    if cache_key:
+        llm_cache.cache_put(cache_key, summary)
+    _interest_cache.add(embedding, summary)
+    return summary
 
 
 async def answer_transcript_question(
@@ -227,40 +341,27 @@ async def answer_transcript_question(
     if not question or not question.strip():
         raise ValueError("Question must not be empty")
 
-    api_key = os.getenv("XAI_API_KEY")
-    base_url = os.getenv("BASE_URL", "https://api.x.ai/v1")
-    if not api_key:
+    if not XAI_API_KEY:
         raise ValueError("Missing XAI_API_KEY")
 
     excerpt = transcript[-4000:] if len(transcript) > 4000 else transcript
 
-    url = f"{base_url}/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
+    # Question goes last so consecutive questions on one transcript share the longest prefix
     prompt = (
-        "You answer questions about a transcript."
-        "Provide a concise (max ~3-4 sentences) answer grounded only in the provided transcript excerpt."
-        "If unsure, say you don't know."
-        f"\nUser interests (for relevance only): {user_interests or 'not provided'}"
-        f"\nQuestion: {question.strip()}"
-        f"\nTranscript excerpt:\n{excerpt}"
+        f"User interests: {user_interests or 'not provided'}"
+        f"{TRANSCRIPT_MARKER}{excerpt}"
+        f"\n---QUESTION---\n{question.strip()}"
     )
     payload = {
         "model": model,
         "messages": [
-            {"role": "system", "content": "You provide concise helpful answers (<=2 sentences)."},
+            {"role": "system", "content": ANSWER_SYSTEM},
             {"role": "user", "content": prompt},
         ],
         "temperature": 0.3,
     }
-    async with httpx.AsyncClient(timeout=20) as client:
-        resp = await client.post(url, headers=headers, json=payload)
-        resp.raise_for_status()
-        data = resp.json()
-        content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-        answer = content.strip()
-        if not answer:
-            raise ValueError("Empty answer from model")
-        return answer
+    content, data = await _stream_chat_completion(payload)
+    answer = content.strip()
+    if not answer:
+        raise ValueError("Empty answer from model")
+    return answer
@@ -1,19 +1,27 @@
 import os
-import json
 import asyncio
 import base64
+import time
+import threading
 import uuid
 import hashlib
 import secrets
 import httpx
+import orjson
+from binascii import b2a_base64
 from pathlib import Path
+from collections import OrderedDict
+from itertools import islice
+from contextlib import asynccontextmanager
+from urllib.parse import quote, urlencode
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, Any, Set
+from typing import Optional, Dict, Any, Set, Tuple, Callable, BinaryIO, TextIO
 
 import websockets
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.websockets import WebSocketState
+from fastapi.responses import Response, FileResponse
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 from llm_utils import (
@@ -22,12 +30,49 @@ from llm_utils import (
     summarize_user_interest_theme,
     generate_artifact_search_query,
     answer_transcript_question,
+    close_client as close_llm_client,
 )
-from tts_service import synthesize_speech, TTSServiceError
+from llm_cache import LRUCache
+from tts_service import synthesize_speech, TTSServiceError, close_client as close_tts_client
+
+# pybase64 is optional - SIMD base64 for the per-chunk audio encode
+try:
+    import pybase64
+    PYBASE64_AVAILABLE = True
+except ImportError:
+    PYBASE64_AVAILABLE = False
+    pybase64 = None
 
 load_dotenv()
 
-app = FastAPI(title="Listening Buddy Backend")
+HTTP_DEBUG = os.getenv("HTTP_DEBUG") == "1"
+
+
+async def log_http_version(response: httpx.Response) -> None:
+    print(f"{response.request.method} {response.request.url.host} -> {response.http_version}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled client for all X API traffic, reused across requests
+    app.state.http = httpx.AsyncClient(
+        timeout=httpx.Timeout(15.0, connect=5.0),
+        limits=httpx.Limits(max_connections=1000, max_keepalive_connections=100, keepalive_expiry=60),
+        http2=True,
+        event_hooks={"response": [log_http_version]} if HTTP_DEBUG else None,
+    )
+    scan_known_sessions()
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+        await close_llm_client()
+        await close_tts_client()
+        for session_id in list(INSIGHT_FILES):
+            close_insights_file(session_id)
+
+
+app = FastAPI(title="Listening Buddy Backend", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -57,9 +102,66 @@ X_OAUTH_SCOPES = os.getenv("X_OAUTH_SCOPES", "tweet.read users.read follows.read
 X_AUTH_URL = "https://twitter.com/i/oauth2/authorize"
 X_TOKEN_URL = "https://api.twitter.com/2/oauth2/token"
 X_BEARER_TOKEN = os.getenv("X_BEARER_TOKEN")
+# Static part of the OAuth authorize URL; only state and code_challenge vary per request
+X_AUTH_STATIC_PARAMS = urlencode(
+    {
+        "response_type": "code",
+        "client_id": X_CLIENT_ID or "",
+        "redirect_uri": X_REDIRECT_URI,
+        "scope": X_OAUTH_SCOPES,
+        "code_challenge_method": "S256",
+    },
+    quote_via=quote,
+)
+X_OAUTH_CONNECTED_HTML = b"""
+    <html>
+      <body>
+        <h2>X integration connected</h2>
+        <p>You can close this window and return to Listening Buddy.</p>
+      </body>
+    </html>
+    """
 TTS_VOICE = os.getenv("TTS_VOICE", "Ara")
 TTS_FORMAT = os.getenv("TTS_FORMAT", "mp3")
 VOICE_QUESTION_SUPPRESSIONS: Set[str] = set()
+# (epoch second, formatted string) reused by now_iso() within the same second
+NOW_ISO_CACHE: list = [0, ""]
+# Session ids with a session.json on disk, so request guards skip the stat
+KNOWN_SESSIONS: Set[str] = set()
+# Per-session insight generation task and the websockets it fans out to
+INSIGHT_TASKS: Dict[str, asyncio.Task] = {}
+INSIGHT_SUBSCRIBERS: Dict[str, Set[WebSocket]] = {}
+# In-flight OAuth PKCE state keyed by state param as (monotonic expiry, pending); x_pending.json is the restart fallback.
+# Abandoned flows are pruned whenever a new one starts.
+PENDING_OAUTH: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+PENDING_OAUTH_TTL_SECONDS = 600
+# Most recent insights entry per recently active session (LRU), used to dedupe appends without rereading the log
+LAST_INSIGHTS: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+# Open, unbuffered insights.jsonl handles, held only while a session's insights loop runs.
+# The lock covers open/write/close since appends run in to_thread workers.
+INSIGHT_FILES: Dict[str, BinaryIO] = {}
+INSIGHT_FILES_LOCK = threading.Lock()
+# Parsed integration files keyed by name, invalidated by file mtime
+INTEGRATION_CACHE: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+# Grok realtime messages are serialized once; base64 output never needs JSON escaping
+GROK_CONFIG_MESSAGE = orjson.dumps(
+    {
+        "type": "config",
+        "data": {
+            "encoding": "linear16",
+            "sample_rate_hertz": 16000,
+            "enable_interim_results": True,
+        },
+    }
+).decode()
+AUDIO_MESSAGE_PREFIX = '{"type":"audio","data":{"audio":"'
+AUDIO_MESSAGE_SUFFIX = '"}}'
+# Upper bound on PCM coalesced into one upstream frame during bursts
+AUDIO_BATCH_MAX_BYTES = 64 * 1024
+# Client audio chunks buffered ahead of the sender; when full, the reader stops pulling from the client socket
+AUDIO_QUEUE_MAX_CHUNKS = 8
+# Live session.json progress updates are coalesced by a background writer, one write per interval
+SESSION_META_WRITE_INTERVAL = 2.0
 
 
 class XIntegrationConfig(BaseModel):
@@ -80,24 +182,116 @@ class VoiceQuestionArmRequest(BaseModel):
     armed: bool = Field(..., description="Whether to route the next transcript chunk as a voice question")
 
 
+# Per-file caches are keyed by session, so cap them to the recently used sessions
+FILE_CACHE_CAPACITY = 64
+
+
+class FileStatCache:
+    """
+    Memoizes loader(path, *args) and only reruns it when the file's (st_mtime_ns, st_size) changes.
+    Holds at most `capacity` entries, evicting the least recently used.
+    """
+
+    def __init__(self, loader: Callable[..., Any], default: Callable[[], Any], capacity: int = FILE_CACHE_CAPACITY):
+        self.loader = loader
+        self.default = default
+        self.capacity = capacity
+        self._entries: "OrderedDict[Tuple[Path, tuple], Tuple[int, int, Any]]" = OrderedDict()
+
+    def get(self, path: Path, *args: Any) -> Any:
+        key = (path, args)
+        try:
+            st = path.stat()
+        except OSError:
+            self._entries.pop(key, None)
+            return self.default()
+        entry = self._entries.get(key)
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            self._entries.move_to_end(key)
+            return entry[2]
+        value = self.loader(path, *args)
+        self._entries[key] = (st.st_mtime_ns, st.st_size, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return value
+
+
+class JsonlTailCache:
+    """
+    Incrementally parsed view of append-only .jsonl files: remembers the byte offset already
+    parsed per path and only decodes lines appended since, reparsing from scratch on truncation.
+    Keeps at most `capacity` files, evicting the least recently used.
+    """
+
+    def __init__(self, capacity: int = FILE_CACHE_CAPACITY):
+        self.capacity = capacity
+        self._entries: "OrderedDict[Path, Tuple[int, int, list]]" = OrderedDict()
+
+    def get(self, path: Path) -> list:
+        try:
+            st = path.stat()
+        except OSError:
+            self._entries.pop(path, None)
+            return []
+        offset, mtime_ns, items = self._entries.get(path, (0, 0, []))
+        if st.st_size < offset:
+            offset, items = 0, []
+        elif st.st_size == offset and st.st_mtime_ns == mtime_ns:
+            self._entries.move_to_end(path)
+            return list(items)
+        items = list(items)
+        with path.open("rb") as f:
+            f.seek(offset)
+            data = f.read()
+        # Leave a trailing partial line for the next read
+        complete = data.rfind(b"\n") + 1
+        for line in data[:complete].splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(orjson.loads(line))
+            except Exception:
+                continue
+        self._entries[path] = (offset + complete, st.st_mtime_ns, items)
+        self._entries.move_to_end(path)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return list(items)
+
+
 def integration_path(name: str) -> Path:
     return INTEGRATIONS_DIR / f"{name}.json"
 
 
 def load_integration(name: str) -> Dict[str, Any]:
     path = integration_path(name)
-    if not path.exists():
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
+        INTEGRATION_CACHE.pop(name, None)
         return {}
+    cached = INTEGRATION_CACHE.get(name)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
     try:
-        return json.loads(path.read_text())
+        data = orjson.loads(path.read_bytes())
     except Exception:
         return {}
+    INTEGRATION_CACHE[name] = (mtime_ns, data)
+    return data
 
 
-def save_integration(name: str, data: Dict[str, Any]) -> None:
+def save_integration_sync(name: str, data: Dict[str, Any]) -> None:
     path = integration_path(name)
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, indent=2))
+    path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    INTEGRATION_CACHE[name] = (path.stat().st_mtime_ns, data)
+
+
+async def save_integration(name: str, data: Dict[str, Any]) -> None:
+    await asyncio.to_thread(save_integration_sync, name, data)
 
 
 def parse_iso8601(dt_str: Optional[str]) -> Optional[datetime]:
@@ -122,6 +316,15 @@ def format_utc_iso(dt: datetime) -> str:
     return dt.astimezone(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
 
+def now_iso() -> str:
+    """Current UTC time in format_utc_iso form, formatted at most once per second."""
+    now = int(time.time())
+    if now != NOW_ISO_CACHE[0]:
+        NOW_ISO_CACHE[0] = now
+        NOW_ISO_CACHE[1] = format_utc_iso(datetime.fromtimestamp(now, timezone.utc))
+    return NOW_ISO_CACHE[1]
+
+
 def resolve_storage_path(relative_name: str) -> Path:
     candidate = (STORAGE_ROOT / relative_name).resolve()
     root = STORAGE_ROOT.resolve()
@@ -130,18 +333,27 @@ def resolve_storage_path(relative_name: str) -> Path:
     return candidate
 
 
-def load_user_interests() -> Dict[str, Any]:
-    if not USER_INTERESTS_FILE.exists():
-        return {}
+def _parse_json_file(path: Path) -> Dict[str, Any]:
     try:
-        return json.loads(USER_INTERESTS_FILE.read_text())
+        return orjson.loads(path.read_bytes())
     except Exception:
         return {}
 
 
-def save_user_interests(data: Dict[str, Any]) -> None:
+USER_INTERESTS_CACHE = FileStatCache(_parse_json_file, dict)
+
+
+def load_user_interests() -> Dict[str, Any]:
+    return USER_INTERESTS_CACHE.get(USER_INTERESTS_FILE)
+
+
+def save_user_interests_sync(data: Dict[str, Any]) -> None:
     USER_INTERESTS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    USER_INTERESTS_FILE.write_text(json.dumps(data, indent=2))
+    USER_INTERESTS_FILE.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
+async def save_user_interests(data: Dict[str, Any]) -> None:
+    await asyncio.to_thread(save_user_interests_sync, data)
 
 
 def get_user_interests_text() -> str:
@@ -153,8 +365,16 @@ def base64url_encode(data: bytes) -> str:
     return base64.urlsafe_b64encode(data).rstrip(b"=").decode("utf-8")
 
 
+def encode_audio_message(data: bytes) -> str:
+    if PYBASE64_AVAILABLE:
+        audio_b64 = pybase64.b64encode_as_string(data)
+    else:
+        audio_b64 = b2a_base64(data, newline=False).decode("ascii")
+    return AUDIO_MESSAGE_PREFIX + audio_b64 + AUDIO_MESSAGE_SUFFIX
+
+
 def build_code_challenge(verifier: str) -> str:
-    digest = hashlib.sha256(verifier.encode("utf-8")).digest()
+    digest = hashlib.sha256(verifier.encode("ascii")).digest()
     return base64url_encode(digest)
 
 
@@ -164,12 +384,11 @@ async def fetch_x_liked_tweets(user_id: str, access_token: str, max_results: int
     params = {"max_results": max(10, min(max_results, 100))}
     headers = {"Authorization": f"Bearer {access_token}"}
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(url, params=params, headers=headers)
-            if resp.status_code != 200:
-                return []
-            data = resp.json()
-            return data.get("data", []) or []
+        resp = await app.state.http.get(url, params=params, headers=headers, timeout=10)
+        if resp.status_code != 200:
+            return []
+        data = resp.json()
+        return data.get("data", []) or []
     except Exception:
         return []
 
@@ -188,11 +407,10 @@ async def search_x_tweets(query: str, start_time: Optional[str], end_time: Optio
     headers = {"Authorization": f"Bearer {X_BEARER_TOKEN}"}
     url = "https://api.x.com/2/tweets/search/all"
     try:
-        async with httpx.AsyncClient(timeout=15) as client:
-            resp = await client.get(url, params=params, headers=headers)
-            resp.raise_for_status()
-            data = resp.json()
-            return data.get("data", []) or []
+        resp = await app.state.http.get(url, params=params, headers=headers)
+        resp.raise_for_status()
+        data = resp.json()
+        return data.get("data", []) or []
     except HTTPException:
         raise
     except Exception as e:
@@ -203,86 +421,195 @@ def summarize_likes_text(likes: list, max_items: int = 5, max_len: int = 200) ->
     """Return a brief summary string of liked tweet texts."""
     if not likes:
         return ""
-    snippets = []
-    for item in likes[:max_items]:
-        text = (item.get("text") or "").replace("\n", " ").strip()
-        if text:
-            snippets.append(text[:max_len])
-    if not snippets:
-        return ""
-    return " | ".join(snippets)
+    # Lazy pipeline: stops touching likes once max_items non-empty snippets are collected
+    snippets = ((item.get("text") or "").replace("\n", " ").strip()[:max_len] for item in likes)
+    return " | ".join(islice(filter(None, snippets), max_items))
 
 
 def insights_path(session_id: str) -> Path:
     return STORAGE_ROOT / session_id / "insights.jsonl"
 
 
-def append_insights(session_id: str, payload: Dict[str, Any], dedupe: bool = True) -> bool:
-    if dedupe:
-        cached = load_insights(session_id)
-        if cached:
-            last = cached[-1]
-            if (last.get("notes") or []) == (payload.get("notes") or []) and (last.get("artifacts") or []) == (payload.get("artifacts") or []):
-                return False
+def read_last_jsonl_entry(path: Path, block_size: int = 4096) -> Optional[Dict[str, Any]]:
+    """Parse only the final line of a .jsonl file by scanning backwards from EOF."""
+    try:
+        with path.open("rb") as f:
+            pos = f.seek(0, os.SEEK_END)
+            buf = b""
+            while pos > 0:
+                step = min(block_size, pos)
+                pos -= step
+                f.seek(pos)
+                buf = f.read(step) + buf
+                if b"\n" in buf.rstrip():
+                    break
+        last_line = buf.strip().rsplit(b"\n", 1)[-1]
+        return orjson.loads(last_line) if last_line else None
+    except Exception:
+        return None
+
+
+def remember_last_insights(session_id: str, entry: Dict[str, Any]) -> None:
+    LAST_INSIGHTS[session_id] = entry
+    LAST_INSIGHTS.move_to_end(session_id)
+    while len(LAST_INSIGHTS) > FILE_CACHE_CAPACITY:
+        LAST_INSIGHTS.popitem(last=False)
+
+
+def append_insights_sync(session_id: str, payload: Dict[str, Any], dedupe: bool = True) -> bool:
     path = insights_path(session_id)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(payload) + "\n")
-    return True
+    with INSIGHT_FILES_LOCK:
+        if dedupe:
+            last = LAST_INSIGHTS.get(session_id)
+            if last is None:
+                last = read_last_jsonl_entry(path)
+            if last:
+                remember_last_insights(session_id, last)
+                if (last.get("notes") or []) == (payload.get("notes") or []) and (last.get("artifacts") or []) == (payload.get("artifacts") or []):
+                    return False
+        line = orjson.dumps(payload) + b"\n"
+        f = INSIGHT_FILES.get(session_id)
+        if f is not None:
+            f.write(line)
+        else:
+            # No insights loop for this session (HTTP callers): open per append
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("ab") as f:
+                f.write(line)
+        remember_last_insights(session_id, payload)
+        return True
 
 
-def load_insights(session_id: str) -> list:
+def open_insights_file(session_id: str) -> None:
     path = insights_path(session_id)
-    if not path.exists():
-        return []
-    items = []
+    with INSIGHT_FILES_LOCK:
+        if session_id not in INSIGHT_FILES:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            INSIGHT_FILES[session_id] = open(path, "ab", buffering=0)
+
+
+def close_insights_file(session_id: str) -> None:
+    # Waits for any in-flight append in a worker thread before closing
+    with INSIGHT_FILES_LOCK:
+        f = INSIGHT_FILES.pop(session_id, None)
+        if f is not None:
+            f.close()
+
+
+async def append_insights(session_id: str, payload: Dict[str, Any], dedupe: bool = True) -> bool:
+    return await asyncio.to_thread(append_insights_sync, session_id, payload, dedupe)
+
+
+INSIGHTS_CACHE = JsonlTailCache()
+
+
+def load_insights(session_id: str) -> list:
     try:
-        with path.open("r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    items.append(json.loads(line))
-                except Exception:
-                    continue
+        return INSIGHTS_CACHE.get(insights_path(session_id))
     except Exception:
         return []
-    return items
 
 
 
 
 
+def read_json_file(path: Path) -> Optional[Any]:
+    try:
+        return orjson.loads(path.read_bytes())
+    except Exception:
+        return None
+
+
+def session_exists(session_id: str) -> bool:
+    """In-memory check first; only unknown ids (e.g. created by another worker) hit the disk."""
+    if session_id in KNOWN_SESSIONS:
+        return True
+    if session_meta_path(session_id).exists():
+        KNOWN_SESSIONS.add(session_id)
+        return True
+    return False
+
+
+def scan_known_sessions() -> None:
+    if not STORAGE_ROOT.exists():
+        return
+    with os.scandir(STORAGE_ROOT) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False) and os.path.exists(os.path.join(entry.path, "session.json")):
+                KNOWN_SESSIONS.add(entry.name)
+
+
+def transcript_path_for(session_id: str) -> Path:
+    return STORAGE_ROOT / session_id / "transcript.txt"
+
+
 def session_meta_path(session_id: str) -> Path:
     return STORAGE_ROOT / session_id / "session.json"
 
 
-def write_session_meta(session_id: str, data: Dict[str, Any]) -> None:
+def write_session_meta_sync(session_id: str, data: Dict[str, Any]) -> None:
     path = session_meta_path(session_id)
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, indent=2))
+    path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
+async def write_session_meta(session_id: str, data: Dict[str, Any]) -> None:
+    # Snapshot so callers can keep mutating their dict while the write runs
+    await asyncio.to_thread(write_session_meta_sync, session_id, dict(data))
+
+
+def append_session_transcript(transcript_file: TextIO, text: str) -> None:
+    # Flushed per line so read_session_text sees it while the session is live
+    transcript_file.write(text + "\n")
+    transcript_file.flush()
+
+
+def _read_transcript(path: Path, max_chars: int) -> str:
+    """Read only the last ~max_chars of the transcript, starting at a line boundary."""
+    try:
+        size = path.stat().st_size
+        with path.open("rb") as f:
+            if size > max_chars:
+                f.seek(size - max_chars)
+            data = f.read()
+    except Exception:
+        return ""
+    if size > max_chars:
+        newline = data.find(b"\n")
+        if newline != -1:
+            data = data[newline + 1 :]
+    return data.decode("utf-8", errors="ignore")
 
 
-def read_session_text(session_id: str, max_chars: int = 6000) -> str:
+TRANSCRIPT_CACHE = FileStatCache(_read_transcript, str)
+
+
+def _read_transcript_head(path: Path, max_chars: int) -> str:
+    try:
+        with path.open(encoding="utf-8") as f:
+            return f.read(max_chars)
+    except Exception:
+        return ""
+
+
+def read_session_text(session_id: str, max_chars: int = 6000, from_start: bool = False) -> str:
     """
     Load transcript text for a session up to max_chars.
-    Prefers the consolidated transcript.txt, falls back to chunk_*.txt if present.
+    Prefers the most recent tail (or the opening, with from_start) of the consolidated transcript.txt, falls back to chunk_*.txt if present.
     """
     session_dir = STORAGE_ROOT / session_id
     if not session_dir.exists():
         return ""
 
-    transcript_file = session_dir / "transcript.txt"
+    transcript_file = transcript_path_for(session_id)
     texts: list[str] = []
     total = 0
 
     if transcript_file.exists():
-        try:
-            content = transcript_file.read_text(encoding="utf-8")
-            texts.append(content[:max_chars])
-        except Exception:
-            pass
+        if from_start:
+            texts.append(_read_transcript_head(transcript_file, max_chars))
+        else:
+            texts.append(TRANSCRIPT_CACHE.get(transcript_file, max_chars))
     else:
         chunks = sorted(session_dir.glob("chunk_*.txt"))
         for chunk in chunks:
@@ -344,8 +671,8 @@ async def set_x_integration(config: XIntegrationConfig):
         payload.get(k)
         for k in ["bearer_token", "api_key", "api_secret", "access_token", "access_token_secret"]
     )
-    payload["updated_at"] = datetime.utcnow().isoformat()
-    save_integration("x", payload)
+    payload["updated_at"] = now_iso()
+    await save_integration("x", payload)
     return {"status": "ok", "connected": payload["connected"], "updated_at": payload["updated_at"]}
 
 
@@ -381,9 +708,9 @@ async def generate_user_interests(force: bool = Query(default=False)):
         "interests_text": interest_theme,
         "raw_likes_summary": summary,
         "likes_sample": enriched_sample,
-        "generated_at": datetime.utcnow().isoformat(),
+        "generated_at": now_iso(),
     }
-    save_user_interests(payload)
+    await save_user_interests(payload)
     return {**payload, "cached": False}
 
 
@@ -404,28 +731,28 @@ async def list_sessions():
     if not STORAGE_ROOT.exists():
         return {"sessions": []}
 
-    for item in STORAGE_ROOT.iterdir():
-        if not item.is_dir():
-            continue
-        if item.name == "integrations":
-            continue
-        meta_file = item / "session.json"
-        if not meta_file.exists():
-            continue
-        try:
-            data = json.loads(meta_file.read_text())
-            sessions.append(
-                {
-                    "session_id": data.get("session_id", item.name),
-                    "start_time": data.get("start_time"),
-                    "end_time": data.get("end_time"),
-                    "duration_seconds": data.get("duration_seconds"),
-                    "chunks": data.get("chunks", 0),
-                    "title": data.get("title"),
-                }
-            )
-        except Exception:
+    with os.scandir(STORAGE_ROOT) as it:
+        session_dirs = [
+            entry.name for entry in it if entry.is_dir(follow_symlinks=False) and entry.name != "integrations"
+        ]
+
+    # Read session.json files in parallel; missing or invalid files come back as None
+    metas = await asyncio.gather(
+        *(asyncio.to_thread(read_json_file, STORAGE_ROOT / name / "session.json") for name in session_dirs)
+    )
+    for name, data in zip(session_dirs, metas):
+        if not isinstance(data, dict):
             continue
+        sessions.append(
+            {
+                "session_id": data.get("session_id", name),
+                "start_time": data.get("start_time"),
+                "end_time": data.get("end_time"),
+                "duration_seconds": data.get("duration_seconds"),
+                "chunks": data.get("chunks", 0),
+                "title": data.get("title"),
+            }
+        )
     # Sort newest first by start_time
     sessions.sort(key=lambda s: s.get("start_time") or "", reverse=True)
     return {"sessions": sessions}
@@ -433,13 +760,12 @@ async def list_sessions():
 
 @app.post("/sessions/{session_id}/title")
 async def generate_session_title(session_id: str):
-    meta_file = session_meta_path(session_id)
-    if not meta_file.exists():
+    if not session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
 
     # Load session metadata
     try:
-        meta = json.loads(meta_file.read_text())
+        meta = orjson.loads(session_meta_path(session_id).read_bytes())
     except Exception:
         meta = {}
 
@@ -447,7 +773,8 @@ async def generate_session_title(session_id: str):
     if meta.get("title"):
         return {"title": meta["title"], "cached": True}
 
-    transcript = read_session_text(session_id)
+    # Titles describe the conversation as a whole, so use its opening rather than the latest tail
+    transcript = read_session_text(session_id, from_start=True)
     if not transcript:
         raise HTTPException(status_code=400, detail="No transcript chunks found for this session")
 
@@ -457,16 +784,15 @@ async def generate_session_title(session_id: str):
         raise HTTPException(status_code=500, detail=f"Title generation failed: {e}")
 
     meta["title"] = title
-    meta["title_generated_at"] = datetime.utcnow().isoformat()
-    write_session_meta(session_id, meta)
+    meta["title_generated_at"] = now_iso()
+    await write_session_meta(session_id, meta)
 
     return {"title": title, "cached": False}
 
 
 @app.get("/sessions/{session_id}/insights")
 async def get_session_insights(session_id: str):
-    meta_file = session_meta_path(session_id)
-    if not meta_file.exists():
+    if not session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
 
     transcript = read_session_text(session_id)
@@ -481,32 +807,43 @@ async def get_session_insights(session_id: str):
     # Otherwise generate once on demand
     user_interests_text = get_user_interests_text()
 
-    try:
-        insights = await generate_insights_from_transcript(transcript, user_interests=user_interests_text)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Insights generation failed: {e}")
-
-    try:
-        artifacts_payload = await build_session_artifacts_response(
+    # Notes and artifact search are independent, so run them concurrently
+    insights, artifacts_payload = await asyncio.gather(
+        generate_insights_from_transcript(transcript, user_interests=user_interests_text),
+        build_session_artifacts_response(
             session_id,
             transcript=transcript,
             user_interests_text=user_interests_text,
             force_generate=True,
             store_result=False,
-        )
-    except Exception:
+        ),
+        return_exceptions=True,
+    )
+    if isinstance(insights, Exception):
+        raise HTTPException(status_code=500, detail=f"Insights generation failed: {insights}")
+    if isinstance(artifacts_payload, Exception):
         artifacts_payload = {"artifacts": [], "query": None}
 
     payload = {
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": now_iso(),
         "notes": insights.get("notes", []),
         "artifacts": artifacts_payload.get("artifacts", []),
         "artifact_query": artifacts_payload.get("query"),
     }
-    append_insights(session_id, payload)
+    await append_insights(session_id, payload)
     return {"insights": [payload]}
 
 
+# Consecutive insight ticks see near-identical excerpts; reuse the query and search for a minute
+ARTIFACT_CACHE_TTL_SECONDS = 60
+ARTIFACT_QUERY_CACHE = LRUCache(capacity=256, ttl=ARTIFACT_CACHE_TTL_SECONDS)
+TWEET_SEARCH_CACHE = LRUCache(capacity=256, ttl=ARTIFACT_CACHE_TTL_SECONDS)
+
+
+def artifact_cache_key(*parts: str) -> str:
+    return hashlib.blake2b("\x00".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
 async def build_session_artifacts_response(
     session_id: str,
     *,
@@ -515,8 +852,7 @@ async def build_session_artifacts_response(
     force_generate: bool = False,
     store_result: bool = False,
 ) -> Dict[str, Any]:
-    meta_file = session_meta_path(session_id)
-    if not meta_file.exists():
+    if not session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
 
     cached_entries = load_insights(session_id)
@@ -530,11 +866,6 @@ async def build_session_artifacts_response(
                     "artifacts": artifacts,
                 }
 
-    try:
-        meta = json.loads(meta_file.read_text())
-    except Exception:
-        meta = {}
-
     if transcript is None:
         transcript = read_session_text(session_id, max_chars=4000)
     if not transcript:
@@ -543,10 +874,14 @@ async def build_session_artifacts_response(
     excerpt = transcript[-1000:] if len(transcript) > 1000 else transcript
     user_interests_text = user_interests_text if user_interests_text is not None else get_user_interests_text()
 
-    try:
-        query = await generate_artifact_search_query(excerpt, user_interests=user_interests_text)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate artifact query: {e}")
+    query_key = artifact_cache_key(excerpt, user_interests_text)
+    query = ARTIFACT_QUERY_CACHE.get(query_key)
+    if query is None:
+        try:
+            query = await generate_artifact_search_query(excerpt, user_interests=user_interests_text)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to generate artifact query: {e}")
+        ARTIFACT_QUERY_CACHE.set(query_key, query)
 
     now_utc = datetime.now(timezone.utc)
     end_date = now_utc.date()
@@ -555,7 +890,12 @@ async def build_session_artifacts_response(
     start_iso = str(start_date) + "T00:00:00Z"
     end_iso = str(end_date) + "T00:00:00Z"
 
-    tweets = await search_x_tweets(query, start_iso, end_iso, max_results=10)
+    search_key = artifact_cache_key(query, start_iso, end_iso)
+    tweets = TWEET_SEARCH_CACHE.get(search_key)
+    if tweets is None:
+        tweets = await search_x_tweets(query, start_iso, end_iso, max_results=10)
+        if tweets:
+            TWEET_SEARCH_CACHE.set(search_key, tweets)
     artifacts = []
     for item in tweets[:3]:
         tweet_id = item.get("id")
@@ -571,7 +911,7 @@ async def build_session_artifacts_response(
         )
 
     payload = {
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": now_iso(),
         "query": query,
         "artifacts": artifacts,
     }
@@ -583,7 +923,7 @@ async def build_session_artifacts_response(
             "artifacts": artifacts,
             "artifact_query": query,
         }
-        append_insights(session_id, entry)
+        await append_insights(session_id, entry)
 
     return payload
 
@@ -595,8 +935,7 @@ async def get_session_artifacts(session_id: str):
 
 @app.post("/sessions/{session_id}/ask")
 async def ask_session_question(session_id: str, payload: SessionQuestion):
-    meta_file = session_meta_path(session_id)
-    if not meta_file.exists():
+    if not session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
 
     transcript = read_session_text(session_id, max_chars=8000)
@@ -619,8 +958,7 @@ async def ask_session_question(session_id: str, payload: SessionQuestion):
 
 @app.post("/sessions/{session_id}/questions")
 async def ask_realtime_question(session_id: str, payload: SessionQuestion):
-    meta_file = session_meta_path(session_id)
-    if not meta_file.exists():
+    if not session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
 
     transcript = read_session_text(session_id, max_chars=8000)
@@ -643,7 +981,8 @@ async def ask_realtime_question(session_id: str, payload: SessionQuestion):
     except TTSServiceError as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
-    audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
+    # The client expects a JSON envelope; encode multi-hundred-KB audio off the event loop
+    audio_base64 = (await asyncio.to_thread(base64.b64encode, audio_bytes)).decode("ascii")
     return {
         "answer": answer,
         "audio_base64": audio_base64,
@@ -654,8 +993,7 @@ async def ask_realtime_question(session_id: str, payload: SessionQuestion):
 
 @app.post("/sessions/{session_id}/questions/arm")
 async def arm_voice_question_mode(session_id: str, payload: VoiceQuestionArmRequest):
-    meta_file = session_meta_path(session_id)
-    if not meta_file.exists():
+    if not session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
 
     if payload.armed:
@@ -666,66 +1004,134 @@ async def arm_voice_question_mode(session_id: str, payload: VoiceQuestionArmRequ
     return {"armed": payload.armed}
 
 
-@app.websocket("/ws/insights/{session_id}")
-async def insights_websocket(ws: WebSocket, session_id: str):
-    await ws.accept()
-    print(f"Insights subscriber connected for session {session_id}")
-
-    meta_file = session_meta_path(session_id)
-    if not meta_file.exists():
-        await ws.send_text(json.dumps({"error": "Session not found"}))
-        await ws.close()
+async def broadcast_insights(session_id: str, message: str) -> None:
+    subscribers = INSIGHT_SUBSCRIBERS.get(session_id)
+    if not subscribers:
         return
+    for ws in list(subscribers):
+        try:
+            await ws.send_text(message)
+        except Exception:
+            subscribers.discard(ws)
 
-    # Send cached insights immediately
-    cached = load_insights(session_id)
-    await ws.send_text(json.dumps({"type": "insights_init", "insights": cached}))
 
-    last_len = 0
+async def run_insights_loop(session_id: str) -> None:
+    """
+    Single generation loop per session; results are fanned out to every subscriber
+    so N open insight sockets cost one LLM + search cycle per interval.
+    """
+    transcript_path = transcript_path_for(session_id)
+    last_size = -1
     try:
-        while True:
+        await asyncio.to_thread(open_insights_file, session_id)
+        while INSIGHT_SUBSCRIBERS.get(session_id):
             await asyncio.sleep(INSIGHTS_INTERVAL_SECONDS)
+            # One stat per tick; only read the transcript when it has grown
+            try:
+                size = transcript_path.stat().st_size
+            except OSError:
+                size = 0
+            if size == last_size:
+                continue
             transcript = read_session_text(session_id, max_chars=4000)
             if not transcript:
+                last_size = size
                 continue
-            if len(transcript) == last_len:
-                continue
-            last_len = len(transcript)
 
             user_interests_text = get_user_interests_text()
 
-            try:
-                insights = await generate_insights_from_transcript(transcript, user_interests=user_interests_text)
-            except Exception as e:
-                await ws.send_text(json.dumps({"type": "error", "message": str(e)}))
-                continue
-
-            try:
-                artifacts_payload = await build_session_artifacts_response(
+            insights, artifacts_payload = await asyncio.gather(
+                generate_insights_from_transcript(transcript, user_interests=user_interests_text),
+                build_session_artifacts_response(
                     session_id,
                     transcript=transcript,
                     user_interests_text=user_interests_text,
                     force_generate=True,
                     store_result=False,
-                )
-            except Exception:
-                artifacts_payload = {"query": None, "artifacts": [], "timestamp": datetime.utcnow().isoformat()}
+                ),
+                return_exceptions=True,
+            )
+            if isinstance(insights, Exception):
+                # last_size is left alone so the next tick retries the same transcript
+                await broadcast_insights(session_id, orjson.dumps({"type": "error", "message": str(insights)}).decode())
+                continue
+            if isinstance(artifacts_payload, Exception):
+                artifacts_payload = {"query": None, "artifacts": [], "timestamp": now_iso()}
 
             combined_payload = {
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": now_iso(),
                 "notes": insights.get("notes", []),
                 "artifacts": artifacts_payload.get("artifacts", []),
                 "artifact_query": artifacts_payload.get("query"),
             }
-            appended = append_insights(session_id, combined_payload)
+            appended = await append_insights(session_id, combined_payload)
+            last_size = size
             if appended:
-                await ws.send_text(json.dumps({"type": "insights", "data": combined_payload}))
+                await broadcast_insights(session_id, orjson.dumps({"type": "insights", "data": combined_payload}).decode())
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"Insights loop error for session {session_id}: {e}")
+        # Deregister before awaiting so a subscriber arriving meanwhile starts a fresh loop
+        if INSIGHT_TASKS.get(session_id) is asyncio.current_task():
+            INSIGHT_TASKS.pop(session_id, None)
+        # Nothing will be sent on these sockets anymore; tell subscribers and close them
+        await broadcast_insights(session_id, orjson.dumps({"type": "error", "message": str(e)}).decode())
+        for ws in list(INSIGHT_SUBSCRIBERS.pop(session_id, ())):
+            try:
+                await ws.close()
+            except Exception:
+                pass
+    finally:
+        if INSIGHT_TASKS.get(session_id) is asyncio.current_task():
+            INSIGHT_TASKS.pop(session_id, None)
+        # A replacement loop may already have started and be sharing the handle
+        if session_id not in INSIGHT_TASKS:
+            close_insights_file(session_id)
+
+
+@app.websocket("/ws/insights/{session_id}")
+async def insights_websocket(ws: WebSocket, session_id: str):
+    await ws.accept()
+    print(f"Insights subscriber connected for session {session_id}")
+
+    if not session_exists(session_id):
+        await ws.send_text(orjson.dumps({"error": "Session not found"}).decode())
+        await ws.close()
+        return
+
+    # Send cached insights immediately
+    cached = load_insights(session_id)
+    await ws.send_text(orjson.dumps({"type": "insights_init", "insights": cached}).decode())
+
+    subscribers = INSIGHT_SUBSCRIBERS.setdefault(session_id, set())
+    subscribers.add(ws)
+    if session_id not in INSIGHT_TASKS:
+        INSIGHT_TASKS[session_id] = asyncio.create_task(run_insights_loop(session_id))
+
+    try:
+        # The session loop does the sending; just wait here for the client to leave
+        while True:
+            message = await ws.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+        print(f"Insights subscriber disconnected for session {session_id}")
     except WebSocketDisconnect:
         print(f"Insights subscriber disconnected for session {session_id}")
     except Exception as e:
         print(f"Insights WS error for session {session_id}: {e}")
     finally:
-        await ws.close()
+        subscribers.discard(ws)
+        # If the loop died and a new subscriber already started a fresh set and loop, leave those alone
+        if not subscribers and INSIGHT_SUBSCRIBERS.get(session_id) is subscribers:
+            INSIGHT_SUBSCRIBERS.pop(session_id, None)
+            task = INSIGHT_TASKS.pop(session_id, None)
+            if task:
+                task.cancel()
+        try:
+            await ws.close()
+        except Exception:
+            pass
 
 @app.get("/integrations/x/oauth/start")
 async def start_x_oauth():
@@ -736,29 +1142,31 @@ async def start_x_oauth():
     code_verifier = secrets.token_urlsafe(64)[:128]
     code_challenge = build_code_challenge(code_verifier)
 
-    auth_url = (
-        f"{X_AUTH_URL}"
-        f"?response_type=code"
-        f"&client_id={X_CLIENT_ID}"
-        f"&redirect_uri={X_REDIRECT_URI}"
-        f"&scope={X_OAUTH_SCOPES.replace(' ', '%20')}"
-        f"&state={state}"
-        f"&code_challenge={code_challenge}"
-        f"&code_challenge_method=S256"
-    )
+    auth_url = f"{X_AUTH_URL}?{X_AUTH_STATIC_PARAMS}&state={state}&code_challenge={code_challenge}"
 
     pending = {
         "state": state,
         "code_verifier": code_verifier,
-        "created_at": datetime.utcnow().isoformat(),
+        "created_at": now_iso(),
     }
-    save_integration("x_pending", pending)
+    await save_integration("x_pending", pending)
+    now = time.monotonic()
+    for stale in [key for key, (expires_at, _) in PENDING_OAUTH.items() if expires_at < now]:
+        del PENDING_OAUTH[stale]
+    PENDING_OAUTH[state] = (now + PENDING_OAUTH_TTL_SECONDS, pending)
     return {"auth_url": auth_url, "state": state}
 
 
-@app.get("/integrations/x/oauth/callback", response_class=HTMLResponse)
+@app.get("/integrations/x/oauth/callback")
 async def x_oauth_callback(code: str = Query(...), state: str = Query(...)):
-    pending = load_integration("x_pending")
+    # Disk copy only matters if the process restarted mid-flow
+    entry = PENDING_OAUTH.pop(state, None)
+    if entry is None:
+        pending = load_integration("x_pending")
+    else:
+        expires_at, pending = entry
+        if expires_at < time.monotonic():
+            pending = None
     if not pending or pending.get("state") != state:
         raise HTTPException(status_code=400, detail="Invalid or missing state")
     if not X_CLIENT_ID:
@@ -778,15 +1186,14 @@ async def x_oauth_callback(code: str = Query(...), state: str = Query(...)):
 
     token_data = {}
     try:
-        async with httpx.AsyncClient(timeout=15) as client:
-            resp = await client.post(
-                X_TOKEN_URL,
-                data=token_payload,
-                auth=(X_CLIENT_ID, X_CLIENT_SECRET) if X_CLIENT_SECRET else None,
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-            )
-            resp.raise_for_status()
-            token_data = resp.json()
+        resp = await app.state.http.post(
+            X_TOKEN_URL,
+            data=token_payload,
+            auth=(X_CLIENT_ID, X_CLIENT_SECRET) if X_CLIENT_SECRET else None,
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        resp.raise_for_status()
+        token_data = resp.json()
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Token exchange failed: {e}")
 
@@ -795,18 +1202,18 @@ async def x_oauth_callback(code: str = Query(...), state: str = Query(...)):
     expires_in = token_data.get("expires_in")
     expires_at = None
     if expires_in:
-        expires_at = (datetime.utcnow() + timedelta(seconds=expires_in)).isoformat()
+        expires_at = format_utc_iso(datetime.now(timezone.utc) + timedelta(seconds=expires_in))
 
     user_info = None
     if access_token:
         try:
-            async with httpx.AsyncClient(timeout=10) as client:
-                user_resp = await client.get(
-                    "https://api.twitter.com/2/users/me",
-                    headers={"Authorization": f"Bearer {access_token}"},
-                )
-                if user_resp.status_code == 200:
-                    user_info = user_resp.json()
+            user_resp = await app.state.http.get(
+                "https://api.twitter.com/2/users/me",
+                headers={"Authorization": f"Bearer {access_token}"},
+                timeout=10,
+            )
+            if user_resp.status_code == 200:
+                user_info = user_resp.json()
         except Exception:
             user_info = None
 
@@ -815,24 +1222,17 @@ async def x_oauth_callback(code: str = Query(...), state: str = Query(...)):
         "refresh_token": refresh_token,
         "expires_at": expires_at,
         "connected": bool(access_token),
-        "updated_at": datetime.utcnow().isoformat(),
+        "updated_at": now_iso(),
         "user": user_info,
     }
-    save_integration("x", saved)
+    await save_integration("x", saved)
     # clear pending
     try:
         integration_path("x_pending").unlink(missing_ok=True)
     except Exception:
         pass
 
-    return """
-    <html>
-      <body>
-        <h2>X integration connected</h2>
-        <p>You can close this window and return to Listening Buddy.</p>
-      </body>
-    </html>
-    """
+    return Response(content=X_OAUTH_CONNECTED_HTML, media_type="text/html")
 
 @app.websocket("/ws/audio")
 async def audio_websocket(client_ws: WebSocket):
@@ -841,146 +1241,190 @@ async def audio_websocket(client_ws: WebSocket):
     session_dir = STORAGE_ROOT / session_id
     session_dir.mkdir(parents=True, exist_ok=True)
     print(f"Extension connected. Session: {session_id}")
-    session_start = datetime.utcnow()
+    session_start = datetime.now(timezone.utc)
+    # Durations come from the monotonic clock; wall-clock time is only formatted for end_time
+    session_start_monotonic = time.monotonic()
     session_meta = {
         "session_id": session_id,
-        "start_time": session_start.isoformat(),
+        "start_time": format_utc_iso(session_start),
         "end_time": None,
         "duration_seconds": None,
         "status": "active",
         "chunks": 0,
         "title": None,
     }
-    write_session_meta(session_id, session_meta)
-    # Initialize transcript file
-    transcript_path = session_dir / "transcript.txt"
-    transcript_path.write_text("", encoding="utf-8")
+    await write_session_meta(session_id, session_meta)
+    KNOWN_SESSIONS.add(session_id)
+    # Initialize transcript file; the handle stays open for the whole session
+    transcript_path = transcript_path_for(session_id)
+    transcript_file = transcript_path.open("w", encoding="utf-8")
 
     try:
-        await client_ws.send_text(json.dumps({"type": "session_started", "session_id": session_id}))
+        await client_ws.send_text(orjson.dumps({"type": "session_started", "session_id": session_id}).decode())
     except WebSocketDisconnect:
         print("Client disconnected before session start ack")
+        transcript_file.close()
         return
     except Exception as exc:
         print(f"Failed to notify client about session start: {exc}")
 
     if not GROK_API_KEY:
         print("Error: XAI_API_KEY not found")
+        transcript_file.close()
         await client_ws.close(code=1000, reason="Server missing API Key")
         return
 
     # Connect to Grok Voice
     headers = {"Authorization": f"Bearer {GROK_API_KEY}"}
-    
+
+    # Transcript path only marks the meta dirty; the writer task does the clock math and disk write.
+    # The lock + closed flag stop an in-flight live write from landing after the final one.
+    meta_dirty = asyncio.Event()
+    meta_lock = threading.Lock()
+    session_closed = threading.Event()
+
+    def write_live_meta(snapshot: Dict[str, Any]) -> None:
+        with meta_lock:
+            if not session_closed.is_set():
+                write_session_meta_sync(session_id, snapshot)
+
+    async def meta_writer():
+        while True:
+            await meta_dirty.wait()
+            await asyncio.sleep(SESSION_META_WRITE_INTERVAL)
+            meta_dirty.clear()
+            session_meta["end_time"] = now_iso()
+            session_meta["duration_seconds"] = time.monotonic() - session_start_monotonic
+            await asyncio.to_thread(write_live_meta, dict(session_meta))
+
+    meta_task = asyncio.create_task(meta_writer())
+
     try:
         async with websockets.connect(WS_URL, additional_headers=headers) as grok_ws:
             print("Connected to Grok Voice API")
 
             # 1. Send Config
-            config_message = {
-                "type": "config",
-                "data": {
-                    "encoding": "linear16",
-                    "sample_rate_hertz": 16000,
-                    "enable_interim_results": True,
-                },
-            }
-            await grok_ws.send(json.dumps(config_message))
+            await grok_ws.send(GROK_CONFIG_MESSAGE)
 
             # 2. Parallel Tasks:
-            # Task A: Client Audio -> Grok
-            async def upstream():
+            # Task A: Client Audio -> queue (None marks the end of the stream)
+            audio_queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=AUDIO_QUEUE_MAX_CHUNKS)
+
+            async def receive_audio():
                 try:
-                    while True:
-                        # Receive raw bytes from extension (Int16 PCM)
-                        data = await client_ws.receive_bytes()
-                        
-                        # Encode to Base64
-                        audio_b64 = base64.b64encode(data).decode("utf-8")
-                        
-                        # Send to Grok
-                        audio_message = {
-                            "type": "audio",
-                            "data": {"audio": audio_b64},
-                        }
-                        await grok_ws.send(json.dumps(audio_message))
-                
+                    # Receive raw bytes from extension (Int16 PCM); ends on client disconnect
+                    async for data in client_ws.iter_bytes():
+                        await audio_queue.put(data)
+                    print("Client disconnected")
                 except WebSocketDisconnect:
                     print("Client disconnected")
                 except Exception as e:
                     print(f"Upstream error: {e}")
+                # Not in a finally: once cancelled there is no sender left to take it
+                await audio_queue.put(None)
+
+            # Task A': queue -> Grok, batching whatever piled up while the previous send was in flight
+            async def upstream():
+                try:
+                    finished = False
+                    while not finished:
+                        data = await audio_queue.get()
+                        if data is None:
+                            break
+                        if not audio_queue.empty():
+                            batch = bytearray(data)
+                            while len(batch) < AUDIO_BATCH_MAX_BYTES and not audio_queue.empty():
+                                more = audio_queue.get_nowait()
+                                if more is None:
+                                    finished = True
+                                    break
+                                batch += more
+                            data = bytes(batch)
+                        # Encode to Base64 and send to Grok
+                        await grok_ws.send(encode_audio_message(data))
+                except Exception as e:
+                    # Re-raised so the TaskGroup cancels the reader instead of it queueing audio nobody sends
+                    print(f"Upstream error: {e}")
+                    raise
 
-            transcript_path = session_dir / "transcript.txt"
-            transcript_path.write_text("", encoding="utf-8")
             chunk_counter = 0
+            # Only the text varies per transcript_final message; the rest is serialized once
+            transcript_message_prefix = (
+                '{"type":"transcript_final","session_id":' + orjson.dumps(session_id).decode() + ',"text":'
+            )
 
             # Task B: Grok Transcripts -> Client (or Log for now)
             async def downstream():
                 nonlocal chunk_counter, session_meta
                 try:
-                    async for message in grok_ws:
-                        response = json.loads(message)
-                        if response.get("data", {}).get("type") == "speech_recognized":
-                            transcript_data = response["data"]["data"]
-                            transcript = transcript_data.get("transcript", "")
-                            is_final = transcript_data.get("is_final", False)
-                            
-                            if transcript:
-                                if is_final:
-                                    print(f"✅ Final: {transcript}")
-                                    normalized_transcript = transcript.strip()
-                                    # Append final text to single transcript file
-                                    if normalized_transcript:
-                                        try:
-                                            await client_ws.send_text(
-                                                json.dumps(
-                                                    {
-                                                        "type": "transcript_final",
-                                                        "session_id": session_id,
-                                                        "text": normalized_transcript,
-                                                    }
-                                                )
-                                            )
-                                        except WebSocketDisconnect:
-                                            print("Client disconnected while sending transcript")
-                                        except Exception as exc:
-                                            print(f"Failed to forward transcript to client: {exc}")
-
-                                        suppress_transcript = session_id in VOICE_QUESTION_SUPPRESSIONS
-
-                                        if suppress_transcript:
-                                            print("Skipping transcript append for voice question chunk")
-                                        else:
-                                            with transcript_path.open("a", encoding="utf-8") as f:
-                                                f.write(normalized_transcript + "\n")
-                                            chunk_counter += 1
-                                            session_meta["chunks"] = chunk_counter
-
-                                        # update duration/end_time on each final so UI sees progress
-                                        now = datetime.utcnow()
-                                        session_meta["end_time"] = now.isoformat()
-                                        session_meta["duration_seconds"] = max((now - session_start).total_seconds(), 0)
-                                        write_session_meta(session_id, session_meta)
-                                # else:
-                                #     print(f"💭 Interim: {transcript}")
-                                
-                                # Optional: Echo back to client if we implemented a receiver there
-                                # await client_ws.send_text(json.dumps({"transcript": transcript, "is_final": is_final}))
+                    while True:
+                        # decode=False hands text frames over as raw UTF-8 bytes, which orjson parses directly.
+                        # Raises ConnectionClosed when Grok goes away, which ends the whole session.
+                        message = await grok_ws.recv(decode=False)
+                        # Only recognition events are used; skip decoding everything else
+                        if b"speech_recognized" not in message:
+                            continue
+                        response = orjson.loads(message)
+                        data = response.get("data") or {}
+                        if data.get("type") != "speech_recognized":
+                            continue
+                        transcript_data = data["data"]
+                        # Interim results are never used, so only finals get extracted
+                        if not transcript_data.get("is_final", False):
+                            continue
+                        transcript = transcript_data.get("transcript", "")
+                        normalized_transcript = transcript.strip()
+                        if not normalized_transcript:
+                            continue
+
+                        print(f"✅ Final: {transcript}")
+                        # Once the extension is gone, keep persisting finals without retrying sends
+                        if client_ws.client_state == WebSocketState.CONNECTED:
+                            try:
+                                await client_ws.send_text(
+                                    transcript_message_prefix + orjson.dumps(normalized_transcript).decode() + "}"
+                                )
+                            except WebSocketDisconnect:
+                                print("Client disconnected while sending transcript")
+                            except Exception as exc:
+                                print(f"Failed to forward transcript to client: {exc}")
+
+                        # Append final text to single transcript file
+                        if session_id in VOICE_QUESTION_SUPPRESSIONS:
+                            print("Skipping transcript append for voice question chunk")
+                        else:
+                            await asyncio.to_thread(append_session_transcript, transcript_file, normalized_transcript)
+                            chunk_counter += 1
+                            session_meta["chunks"] = chunk_counter
+
+                        # update duration/end_time so UI sees progress; the finally block writes the last state
+                        meta_dirty.set()
                 except Exception as e:
-                    print(f"Downstream error: {e}")
+                    if not isinstance(e, websockets.ConnectionClosed):
+                        print(f"Downstream error: {e}")
+                    raise
 
-            # Run both
-            await asyncio.gather(upstream(), downstream())
+            # Run all three; a failure on the Grok side (upstream/downstream) cancels the others
+            try:
+                async with asyncio.TaskGroup() as tg:
+                    tg.create_task(receive_audio())
+                    tg.create_task(upstream())
+                    tg.create_task(downstream())
+            except* websockets.ConnectionClosed:
+                print("Grok connection closed")
 
     except Exception as e:
         print(f"Error in session: {e}")
     finally:
+        meta_task.cancel()
+        transcript_file.close()
         if session_start:
-            end_time = datetime.utcnow()
-            duration = max((end_time - session_start).total_seconds(), 0)
-            session_meta["end_time"] = end_time.isoformat()
-            session_meta["duration_seconds"] = duration
+            session_meta["end_time"] = format_utc_iso(datetime.now(timezone.utc))
+            session_meta["duration_seconds"] = time.monotonic() - session_start_monotonic
             session_meta["status"] = "completed"
-            write_session_meta(session_id, session_meta)
+            # Sync on purpose: the final write must land even if the handler is being cancelled
+            with meta_lock:
+                session_closed.set()
+                write_session_meta_sync(session_id, session_meta)
         VOICE_QUESTION_SUPPRESSIONS.discard(session_id)
         print(f"Session closed: {session_id}")
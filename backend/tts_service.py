@@ -1,5 +1,5 @@
 import os
-from typing import Tuple
+from typing import Optional, Tuple
 
 import httpx
 from dotenv import load_dotenv
@@ -15,6 +15,27 @@ class TTSServiceError(Exception):
     ...
 
 
+_HTTP_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+async def get_client() -> httpx.AsyncClient:
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+        _HTTP_CLIENT = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0),
+            limits=httpx.Limits(max_keepalive_connections=10),
+            http2=True,
+        )
+    return _HTTP_CLIENT
+
+
+async def close_client() -> None:
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is not None:
+        await _HTTP_CLIENT.aclose()
+        _HTTP_CLIENT = None
+
+
 async def synthesize_speech(text: str, voice: str = "Ara", response_format: str = "mp3") -> Tuple[bytes, str]:
     """
     Convert plain text into speech audio bytes using the X.AI API.
@@ -37,11 +58,11 @@ async def synthesize_speech(text: str, voice: str = "Ara", response_format: str
     }
 
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(TTS_URL, headers=headers, json=payload)
-            response.raise_for_status()
-            content_type = response.headers.get("content-type", "audio/mpeg")
-            return response.content, content_type
+        client = await get_client()
+        response = await client.post(TTS_URL, headers=headers, json=payload)
+        response.raise_for_status()
+        content_type = response.headers.get("content-type", "audio/mpeg")
+        return response.content, content_type
     except httpx.HTTPStatusError as exc:
         detail = exc.response.text if exc.response is not None else str(exc)
         raise TTSServiceError(f"TTS request failed: {detail}") from exc